@@ -0,0 +1,14 @@
+"""Settings shared by the Streamlit app and the poller sidecar."""
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+QDRANT_HOST = os.getenv("QDRANT_HOST")
+QDRANT_API_KEY = os.getenv("QDRANT_API_KEY")
+QDRANT_GRPC_PORT = 6334
+# pool_size needs qdrant-client >= 1.16
+QDRANT_POOL_SIZE = int(os.getenv("QDRANT_POOL_SIZE", "32"))
+HEALTH_DB_PATH = os.getenv("HEALTH_DB_PATH", "health.db")
+POLL_INTERVAL = int(os.getenv("POLL_INTERVAL", "60"))
+HISTORY_WINDOW = 24 * 60 * 60
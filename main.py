@@ -1,23 +1,41 @@
 import streamlit as st
 from qdrant_client import QdrantClient
 import plotly.graph_objects as go
-from datetime import datetime, timedelta
 import pandas as pd
+import numpy as np
 import logging
 from twilio.rest import Client
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import os
-from dotenv import load_dotenv
 import time
+import threading
+import asyncio
+import orjson
+import sqlite3
+from contextlib import closing
+from urllib.parse import quote
+from urllib.request import Request, urlopen
+from streamlit_autorefresh import st_autorefresh
+from config import (
+    QDRANT_HOST,
+    QDRANT_API_KEY,
+    QDRANT_GRPC_PORT,
+    QDRANT_POOL_SIZE,
+    HEALTH_DB_PATH,
+    POLL_INTERVAL,
+    HISTORY_WINDOW
+)
 
-load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-QDRANT_HOST = os.getenv("QDRANT_HOST")
-QDRANT_API_KEY = os.getenv("QDRANT_API_KEY")
+COLLECTIONS_TTL = 300
+MIN_REFRESH_INTERVAL = 30
+DEFAULT_REFRESH_INTERVAL = 60
+POLLER_URL = os.getenv("POLLER_URL", "http://localhost:8000")
+STALE_AFTER = 2 * POLL_INTERVAL
 COLLECTION_NAME = None
 
 EMAIL_CONFIG = {
@@ -35,101 +53,176 @@ TWILIO_CONFIG = {
    'to_number': os.getenv("TWILIO_TO_NUMBER")
 }
 
-if 'last_check_time' not in st.session_state:
-   st.session_state.last_check_time = None
-if 'health_history' not in st.session_state:
-   st.session_state.health_history = []
-if 'response_times' not in st.session_state:
-   st.session_state.response_times = []
+# Resolved once so figures don't look up and merge the template on every build
+RESPONSE_TIME_LAYOUT = go.Layout(
+   title="API Response Time Trend",
+   xaxis_title="Time (UTC)",
+   yaxis_title="Response Time (ms)",
+   height=400,
+   template="plotly_white"
+).to_plotly_json()
 
 @st.cache_resource
-def get_qdrant_client():
+def get_qdrant_client(url: str, api_key: str, pool_size: int):
+   # Config is passed explicitly so changing it yields a new cached client
    return QdrantClient(
-       url=QDRANT_HOST,
-       api_key=QDRANT_API_KEY,
+       url=url,
+       api_key=api_key,
+       prefer_grpc=True,
+       grpc_port=QDRANT_GRPC_PORT,
+       pool_size=pool_size,
        timeout=10.0
    )
 
+@st.cache_data(ttl=COLLECTIONS_TTL)
 def list_collections():
     try:
-        client = get_qdrant_client()
+        client = get_qdrant_client(QDRANT_HOST, QDRANT_API_KEY, QDRANT_POOL_SIZE)
         collections = client.get_collections()
         return [col.name for col in collections.collections]
     except Exception as e:
         logger.error(f"Failed to list collections: {str(e)}")
         return []
 
-def send_email_alert(status: str, details: str):
-   try:
-       msg = MIMEMultipart()
-       msg['From'] = EMAIL_CONFIG['from']
-       msg['To'] = EMAIL_CONFIG['to']
-       msg['Subject'] = f"Qdrant Monitor Alert - {status}"
-       msg.attach(MIMEText(details, 'plain'))
-       
-       with smtplib.SMTP(EMAIL_CONFIG['smtp_server'], EMAIL_CONFIG['smtp_port']) as server:
-           server.starttls()
-           server.login(EMAIL_CONFIG['from'], EMAIL_CONFIG['password'])
-           server.send_message(msg)
-       return True
-   except Exception as e:
-       st.error(f"Failed to send email: {str(e)}")
-       return False
+class SMTPConnection:
+    """Keeps one authenticated SMTP session open between alerts."""
 
-def send_sms_alert(message: str):
-   try:
-       client = Client(TWILIO_CONFIG['account_sid'], TWILIO_CONFIG['auth_token'])
-       client.messages.create(
-           body=message,
-           from_=TWILIO_CONFIG['from_number'],
-           to=TWILIO_CONFIG['to_number']
-       )
-       return True
-   except Exception as e:
-       st.error(f"Failed to send SMS: {str(e)}")
-       return False
+    def __init__(self):
+        self._server = None
+        self._lock = threading.Lock()
 
-def check_api_health(collection_name):
-    start_time = time.time()
-    try:
-        client = get_qdrant_client()
-        # First check if collection exists
-        collections = client.get_collections()
-        if collection_name not in [col.name for col in collections.collections]:
-            return False, f"Collection '{collection_name}' not found", None
-            
-        # Try to get basic collection info without detailed config
+    def _connect(self):
+        server = smtplib.SMTP(EMAIL_CONFIG['smtp_server'], EMAIL_CONFIG['smtp_port'])
         try:
-            collection_info = client.get_collection(collection_name)
-            response_time = (time.time() - start_time) * 1000
-            
-            # Extract only necessary info to avoid validation errors
-            safe_info = {
-                "name": collection_info.name,
-                "status": "green",
-                "vectors_count": collection_info.vectors_count,
-                "points_count": collection_info.points_count,
-                "segments_count": collection_info.segments_count
-            }
-            return True, safe_info, response_time
-        except Exception as collection_error:
-            logger.error(f"Collection info error: {str(collection_error)}")
-            return False, f"Failed to get collection info: {str(collection_error)}", None
-            
-    except Exception as e:
-        logger.error(f"Connection error: {str(e)}")
-        return False, f"Failed to connect to Qdrant: {str(e)}", None
+            server.starttls()
+            server.login(EMAIL_CONFIG['from'], EMAIL_CONFIG['password'])
+        except Exception:
+            server.close()
+            raise
+        return server
+
+    def _reconnect(self):
+        if self._server is not None:
+            self._server.close()
+            self._server = None
+        self._server = self._connect()
+
+    def _is_alive(self):
+        try:
+            return self._server.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
 
-def update_metrics(status: bool, response_time: float = None):
-   now = datetime.now()
-   st.session_state.last_check_time = now
-   st.session_state.health_history.append((now, status))
-   if response_time:
-       st.session_state.response_times.append((now, response_time))
+    def send_message(self, msg):
+        with self._lock:
+            if self._server is None or not self._is_alive():
+                self._reconnect()
+            try:
+                self._server.send_message(msg)
+            except smtplib.SMTPServerDisconnected:
+                # Idle timeout between the NOOP and the send; re-login once
+                self._reconnect()
+                self._server.send_message(msg)
+
+@st.cache_resource
+def get_smtp_connection():
+   return SMTPConnection()
+
+@st.cache_resource
+def get_twilio_client():
+   return Client(TWILIO_CONFIG['account_sid'], TWILIO_CONFIG['auth_token'])
+
+def send_email_alert(smtp: SMTPConnection, status: str, details: str):
+   msg = MIMEMultipart()
+   msg['From'] = EMAIL_CONFIG['from']
+   msg['To'] = EMAIL_CONFIG['to']
+   msg['Subject'] = f"Qdrant Monitor Alert - {status}"
+   msg.attach(MIMEText(details, 'plain'))
    
-   cutoff = now - timedelta(hours=24)
-   st.session_state.health_history = [(t, s) for t, s in st.session_state.health_history if t > cutoff]
-   st.session_state.response_times = [(t, r) for t, r in st.session_state.response_times if t > cutoff]
+   smtp.send_message(msg)
+
+def send_sms_alert(client: Client, message: str):
+   client.messages.create(
+       body=message,
+       from_=TWILIO_CONFIG['from_number'],
+       to=TWILIO_CONFIG['to_number']
+   )
+
+async def send_alerts(status: str, details: str, message: str):
+   # Email and SMS are independent blocking I/O; run them side by side.
+   # Failures come back as exception objects rather than raising.
+   # Resolve the cached clients here, on the script thread: st.cache_resource
+   # needs the ScriptRunContext that the worker threads don't have.
+   smtp = get_smtp_connection()
+   twilio_client = get_twilio_client()
+   return await asyncio.gather(
+       asyncio.to_thread(send_email_alert, smtp, status, details),
+       asyncio.to_thread(send_sms_alert, twilio_client, message),
+       return_exceptions=True
+   )
+
+def request_check(collection_name):
+    """Ask the poller sidecar to check a collection right away."""
+    url = f"{POLLER_URL}/check/{quote(collection_name, safe='')}"
+    with urlopen(Request(url, method="POST"), timeout=15) as response:
+        return orjson.loads(response.read())
+
+def load_snapshot(collection_name):
+    """Read the last 24h of samples the poller recorded for a collection."""
+    cutoff = time.time() - HISTORY_WINDOW
+    with closing(sqlite3.connect(f"file:{HEALTH_DB_PATH}?mode=ro", uri=True)) as conn:
+        history = pd.read_sql(
+            "SELECT ts, status, response_time FROM health "
+            "WHERE collection = ? AND ts > ? ORDER BY ts",
+            conn,
+            params=(collection_name, cutoff)
+        )
+        latest = conn.execute(
+            "SELECT status, details, response_time, ts FROM health "
+            "WHERE collection = ? ORDER BY ts DESC LIMIT 1",
+            (collection_name,)
+        ).fetchone()
+    
+    last_result = None
+    if latest:
+        last_result = (bool(latest[0]), orjson.loads(latest[1]), latest[2], latest[3])
+    health_ts = history['ts'].to_numpy()
+    response_ms = history['response_time'].to_numpy(dtype=float)
+    responded = ~np.isnan(response_ms)
+    return (
+        last_result,
+        health_ts,
+        history['status'].to_numpy(dtype=bool),
+        health_ts[responded],
+        response_ms[responded]
+    )
+
+def summarize_metrics(health_status, response_ms):
+    """Uptime %, mean and max response time from the snapshot arrays."""
+    uptime = health_status.mean() * 100 if health_status.size else None
+    if not response_ms.size:
+        return uptime, None, None
+    return uptime, response_ms.mean(), response_ms.max()
+
+def build_response_time_figure(alert_threshold):
+   fig = go.Figure(
+       data=[go.Scattergl(
+           x=[],
+           y=[],
+           mode='lines+markers',
+           name='Response Time',
+           line=dict(color='#1E88E5')
+       )],
+       layout=RESPONSE_TIME_LAYOUT
+   )
+   
+   fig.add_hline(
+       y=alert_threshold,
+       line_dash="dash",
+       line_color="red",
+       annotation_text="Alert Threshold"
+   )
+   return fig
 
 def main():
    st.set_page_config(
@@ -154,8 +247,13 @@ def main():
    
    st.sidebar.header("⚙️ Settings")
    
+   if st.sidebar.button("🔃 Refresh collections"):
+       list_collections.clear()
+   
    collections = list_collections()
    if not collections:
+       # Don't keep a failed lookup cached for the whole TTL
+       list_collections.clear()
        st.error("⚠️ Failed to fetch collections. Please check your Qdrant connection settings.")
        return
 
@@ -167,12 +265,14 @@ def main():
    
    refresh_interval = st.sidebar.slider(
        "Auto Refresh Interval (seconds)",
-       min_value=30,
+       min_value=MIN_REFRESH_INTERVAL,
        max_value=300,
-       value=60,
+       value=DEFAULT_REFRESH_INTERVAL,
        step=30
    )
    
+   st_autorefresh(interval=refresh_interval * 1000, key="poll")
+   
    alert_threshold = st.sidebar.number_input(
        "Response Time Alert Threshold (ms)",
        min_value=100,
@@ -184,65 +284,70 @@ def main():
    
    with col1:
        st.subheader("📊 API Status")
-       check_button = st.button("🔄 Check Now")
-       
-       if check_button or (
-           st.session_state.last_check_time is None or 
-           (datetime.now() - st.session_state.last_check_time).seconds >= refresh_interval
-       ):
+       if st.button("🔄 Check Now"):
            with st.spinner("Checking API status..."):
-               status, details, response_time = check_api_health(selected_collection)
-               update_metrics(status, response_time)
-               
-               if status:
-                   st.success("✅ API is healthy")
-                   st.metric("Response Time", f"{response_time:.2f} ms")
-                   if response_time > alert_threshold:
-                       st.warning(f"⚠️ Response time above threshold ({alert_threshold} ms)")
-                   with st.expander("Details"):
-                       st.json(details)
-               else:
-                   st.error(f"❌ API is down: {details}")
-                   if st.button("🚨 Send Alerts"):
-                       email_sent = send_email_alert("API Down", str(details))
-                       sms_sent = send_sms_alert(f"Qdrant API is down: {str(details)[:100]}...")
-                       
-                       if email_sent:
-                           st.success("📧 Email alert sent")
-                       if sms_sent:
-                           st.success("📱 SMS alert sent")
+               try:
+                   request_check(selected_collection)
+               except OSError as e:
+                   st.error(f"⚠️ Failed to reach the health poller: {str(e)}")
+   
+   try:
+       last_result, health_ts, health_status, response_ts, response_ms = load_snapshot(selected_collection)
+   except (sqlite3.Error, pd.errors.DatabaseError) as e:
+       st.error(f"⚠️ No health data available. Is the poller running? ({str(e)})")
+       return
+   uptime, mean_response_time, max_response_time = summarize_metrics(health_status, response_ms)
+   
+   with col1:
+       if last_result is None:
+           st.info("Waiting for the first health check...")
+       else:
+           status, details, response_time, checked_at = last_result
+           age = time.time() - checked_at
+           st.caption(f"Last checked {age:.0f}s ago")
+           if age > STALE_AFTER:
+               # The poller has stopped recording; don't keep showing an old result
+               status = False
+               details = f"No health check recorded for {age:.0f}s. Is the poller running?"
+           if status:
+               st.success("✅ API is healthy")
+               st.metric("Response Time", f"{response_time:.2f} ms")
+               if response_time > alert_threshold:
+                   st.warning(f"⚠️ Response time above threshold ({alert_threshold} ms)")
+               with st.expander("Details"):
+                   st.code(
+                       orjson.dumps(details, option=orjson.OPT_INDENT_2).decode(),
+                       language="json"
+                   )
+           else:
+               st.error(f"❌ API is down: {details}")
+               if st.button("🚨 Send Alerts"):
+                   email_error, sms_error = asyncio.run(send_alerts(
+                       "API Down",
+                       str(details),
+                       f"Qdrant API is down: {str(details)[:100]}..."
+                   ))
+                   
+                   if email_error:
+                       st.error(f"Failed to send email: {str(email_error)}")
+                   else:
+                       st.success("📧 Email alert sent")
+                   if sms_error:
+                       st.error(f"Failed to send SMS: {str(sms_error)}")
+                   else:
+                       st.success("📱 SMS alert sent")
    
    with col2:
        st.subheader("📈 Performance Metrics")
-       if st.session_state.response_times:
-           df = pd.DataFrame(
-               st.session_state.response_times,
-               columns=['timestamp', 'response_time']
-           ).set_index('timestamp')
-           
-           fig = go.Figure()
-           fig.add_trace(go.Scatter(
-               x=df.index,
-               y=df['response_time'],
-               mode='lines+markers',
-               name='Response Time',
-               line=dict(color='#1E88E5')
-           ))
-           
-           fig.update_layout(
-               title="API Response Time Trend",
-               xaxis_title="Time",
-               yaxis_title="Response Time (ms)",
-               height=400,
-               template="plotly_white"
-           )
-           
-           fig.add_hline(
-               y=alert_threshold,
-               line_dash="dash",
-               line_color="red",
-               annotation_text="Alert Threshold"
-           )
+       if response_ms.size:
+           if 'response_time_fig' not in st.session_state:
+               st.session_state.response_time_fig = build_response_time_figure(alert_threshold)
+           fig = st.session_state.response_time_fig
+           # Naive UTC; the axis title says so
+           fig.data[0].x = (response_ts * 1000).astype('datetime64[ms]')
+           fig.data[0].y = response_ms
+           fig.update_shapes(y0=alert_threshold, y1=alert_threshold)
+           fig.update_annotations(y=alert_threshold)
            
            st.plotly_chart(fig, use_container_width=True)
            
@@ -250,30 +355,30 @@ def main():
            with col_stats1:
                st.metric(
                    "Average Response Time",
-                   f"{df['response_time'].mean():.2f} ms"
+                   f"{mean_response_time:.2f} ms"
                )
            with col_stats2:
                st.metric(
                    "Max Response Time",
-                   f"{df['response_time'].max():.2f} ms"
+                   f"{max_response_time:.2f} ms"
                )
        else:
            st.info("Waiting for performance data...")
    
    st.subheader("📋 Health History")
-   if st.session_state.health_history:
-       history_df = pd.DataFrame(
-           st.session_state.health_history,
-           columns=['timestamp', 'status']
-       ).set_index('timestamp')
-       
-       uptime = (history_df['status'].sum() / len(history_df)) * 100
+   if health_status.size:
        st.metric("Uptime (24h)", f"{uptime:.2f}%")
        
        st.dataframe(
-           history_df.tail(10).style.applymap(
-               lambda x: 'background-color: #90EE90' if x else 'background-color: #FFB6C6'
-           )
+           {
+               'timestamp': (health_ts[-10:] * 1000).astype('datetime64[ms]'),
+               'status': health_status[-10:]
+           },
+           column_config={
+               'timestamp': st.column_config.DatetimeColumn("Timestamp (UTC)"),
+               'status': st.column_config.CheckboxColumn("Healthy")
+           },
+           hide_index=True
        )
    else:
        st.info("No health history available yet...")
@@ -0,0 +1,248 @@
+import asyncio
+import functools
+import logging
+import os
+import sqlite3
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Optional
+from urllib.parse import urlparse
+
+import grpc
+import uvicorn
+import orjson
+from fastapi import FastAPI, HTTPException, Response
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.http.exceptions import UnexpectedResponse
+
+from config import (
+    QDRANT_HOST,
+    QDRANT_API_KEY,
+    QDRANT_GRPC_PORT,
+    QDRANT_POOL_SIZE,
+    HEALTH_DB_PATH,
+    POLL_INTERVAL,
+    HISTORY_WINDOW
+)
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+POLLER_HOST = os.getenv("POLLER_HOST", "127.0.0.1")
+POLLER_PORT = int(os.getenv("POLLER_PORT", "8000"))
+TCP_PROBE_TIMEOUT = 0.5
+# gRPC endpoint for the TCP liveness probe; hostname is None if QDRANT_HOST has no scheme
+QDRANT_ADDRESS = (urlparse(QDRANT_HOST or "").hostname, QDRANT_GRPC_PORT)
+UNREACHABLE_DETAILS = f"Qdrant is unreachable at {QDRANT_ADDRESS[0]}:{QDRANT_ADDRESS[1]}"
+
+
+def init_db():
+    conn = sqlite3.connect(HEALTH_DB_PATH)
+    # WAL lets the Streamlit UI read while the poller writes
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS health (
+            collection TEXT NOT NULL,
+            ts REAL NOT NULL,
+            status INTEGER NOT NULL,
+            response_time REAL,
+            details TEXT
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS health_collection_ts ON health (collection, ts)")
+    conn.commit()
+    return conn
+
+
+@dataclass(slots=True)
+class SafeInfo:
+    """Collection fields recorded by each health check."""
+    name: str
+    status: str = "green"
+    indexed_vectors_count: Optional[int] = None
+    points_count: Optional[int] = None
+    segments_count: Optional[int] = None
+
+
+async def tcp_probe():
+    """Return False if a TCP handshake with Qdrant can't complete quickly."""
+    if QDRANT_ADDRESS[0] is None:
+        return True
+    try:
+        _, writer = await asyncio.wait_for(
+            asyncio.open_connection(*QDRANT_ADDRESS),
+            TCP_PROBE_TIMEOUT
+        )
+    except (OSError, asyncio.TimeoutError):
+        return False
+    writer.close()
+    return True
+
+
+def make_checker(client, collection_name):
+    """Build a health check bound to one collection."""
+    get_collection = functools.partial(client.get_collection, collection_name)
+    not_found = (False, f"Collection '{collection_name}' not found", None)
+    # Reused across ticks; serialized right after each check
+    safe_info = SafeInfo(name=collection_name)
+    unreachable = (False, UNREACHABLE_DETAILS, None)
+    # Set only when the last check couldn't reach Qdrant, not on 404s or other errors
+    connection_lost = False
+
+    async def check_api_health(probe=False):
+        # Scheduled ticks are already probed by poll_once; callers outside the
+        # poll loop pass probe=True so a dead host fails in TCP_PROBE_TIMEOUT
+        # instead of the full RPC timeout
+        if probe and connection_lost and not await tcp_probe():
+            return unreachable
+        return await get_collection_info()
+
+    async def get_collection_info():
+        nonlocal connection_lost
+        connection_lost = False
+        start_time = time.perf_counter()
+        # Try to get basic collection info without detailed config;
+        # a missing collection surfaces as a not-found error here
+        try:
+            collection_info = await get_collection()
+            response_time = (time.perf_counter() - start_time) * 1000
+
+            # Extract only necessary info to avoid validation errors
+            safe_info.indexed_vectors_count = collection_info.indexed_vectors_count
+            safe_info.points_count = collection_info.points_count
+            safe_info.segments_count = collection_info.segments_count
+            return True, safe_info, response_time
+        except UnexpectedResponse as collection_error:
+            if collection_error.status_code == 404:
+                return not_found
+            logger.error(f"Collection info error: {str(collection_error)}")
+            return False, f"Failed to get collection info: {str(collection_error)}", None
+        except grpc.RpcError as collection_error:
+            code = collection_error.code()
+            if code == grpc.StatusCode.NOT_FOUND:
+                return not_found
+            connection_lost = code in (grpc.StatusCode.UNAVAILABLE, grpc.StatusCode.DEADLINE_EXCEEDED)
+            logger.error(f"Collection info error: {str(collection_error)}")
+            return False, f"Failed to get collection info: {str(collection_error)}", None
+        except Exception as e:
+            connection_lost = True
+            logger.error(f"Connection error: {str(e)}")
+            return False, f"Failed to connect to Qdrant: {str(e)}", None
+
+    return check_api_health
+
+
+def record_samples(conn, samples):
+    """Insert (collection, status, details, response_time) samples stamped now."""
+    now = time.time()
+    with conn:
+        conn.executemany(
+            "INSERT INTO health (collection, ts, status, response_time, details) VALUES (?, ?, ?, ?, ?)",
+            [
+                (collection_name, now, status, response_time, orjson.dumps(details).decode())
+                for collection_name, status, details, response_time in samples
+            ]
+        )
+
+
+def get_checker(state, collection_name):
+    # Checkers are kept only for collections in the last listing; see set_collections
+    checker = state.checkers.get(collection_name)
+    if checker is None:
+        checker = state.checkers[collection_name] = make_checker(state.client, collection_name)
+    return checker
+
+
+def set_collections(state, names):
+    state.collections = names
+    for name in state.checkers.keys() - set(names):
+        del state.checkers[name]
+
+
+async def check_and_record(state, collection_name, probe=False):
+    status, details, response_time = await get_checker(state, collection_name)(probe)
+    record_samples(state.db, [(collection_name, status, details, response_time)])
+    return status, details, response_time
+
+
+async def poll_once(state):
+    """Check every collection, updating state.collections from the listing."""
+    # Fail fast on a dead host instead of waiting out the RPC timeout
+    if not await tcp_probe():
+        logger.error(UNREACHABLE_DETAILS)
+        record_samples(state.db, [(name, False, UNREACHABLE_DETAILS, None) for name in state.collections])
+        return
+
+    try:
+        collections = await state.client.get_collections()
+    except Exception as e:
+        logger.error(f"Failed to list collections: {str(e)}")
+        # Qdrant can't even list collections: record the outage against
+        # every collection we know about so the UI sees it
+        details = f"Failed to list collections: {str(e)}"
+        record_samples(state.db, [(name, False, details, None) for name in state.collections])
+        return
+
+    set_collections(state, [col.name for col in collections.collections])
+    await asyncio.gather(*(check_and_record(state, name) for name in state.collections))
+
+
+async def poll_forever(state):
+    next_poll = time.monotonic()
+    while True:
+        # Schedule from a monotonic deadline so slow checks don't stretch the interval
+        next_poll = max(next_poll, time.monotonic()) + POLL_INTERVAL
+        try:
+            await poll_once(state)
+            with state.db:
+                state.db.execute("DELETE FROM health WHERE ts <= ?", (time.time() - HISTORY_WINDOW,))
+        except Exception as e:
+            logger.error(f"Health poll failed: {str(e)}")
+        await asyncio.sleep(max(0.0, next_poll - time.monotonic()))
+
+
+@asynccontextmanager
+async def lifespan(app):
+    app.state.client = AsyncQdrantClient(
+        url=QDRANT_HOST,
+        api_key=QDRANT_API_KEY,
+        prefer_grpc=True,
+        grpc_port=QDRANT_GRPC_PORT,
+        pool_size=QDRANT_POOL_SIZE,
+        timeout=10.0
+    )
+    app.state.db = init_db()
+    app.state.checkers = {}
+    # Seed from history so an outage at startup is still recorded
+    app.state.collections = [row[0] for row in app.state.db.execute("SELECT DISTINCT collection FROM health")]
+    task = asyncio.create_task(poll_forever(app.state))
+    yield
+    task.cancel()
+    await app.state.client.close()
+    app.state.db.close()
+
+
+app = FastAPI(lifespan=lifespan)
+
+
+@app.post("/check/{collection_name}")
+async def check_now(collection_name: str):
+    state = app.state
+    if collection_name not in state.collections:
+        # May have been created since the last tick
+        try:
+            collections = await state.client.get_collections()
+        except Exception as e:
+            raise HTTPException(status_code=503, detail=f"Failed to list collections: {str(e)}")
+        set_collections(state, [col.name for col in collections.collections])
+    if collection_name not in state.collections:
+        raise HTTPException(status_code=404, detail=f"Collection '{collection_name}' not found")
+    status, details, response_time = await check_and_record(state, collection_name, probe=True)
+    # Encode now, before the next poll tick mutates the shared SafeInfo
+    body = orjson.dumps({"status": status, "details": details, "response_time": response_time})
+    return Response(body, media_type="application/json")
+
+
+if __name__ == "__main__":
+    uvicorn.run(app, host=POLLER_HOST, port=POLLER_PORT, workers=1)